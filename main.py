@@ -1,21 +1,339 @@
-import requests
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-import json
+import httpx
+import diskcache
+from cachetools import TTLCache
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Union
+import hashlib
+import ijson
+import orjson
 import asyncio
+import os
+import tempfile
+import uvicorn
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from fastmcp import FastMCP
 
+# Frequently requested cities with known coordinates, used to pre-warm the geocode cache
+CITIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cities.json")
+
+
+@asynccontextmanager
+async def _lifespan(server: FastMCP):
+    """Pre-warm the geocode cache when the server starts"""
+    _prewarm_geocode_cache()
+    yield
+
+
 # Initialize FastMCP
-mcp = FastMCP(name="Weather-Forecast-MCP-Server")
+mcp = FastMCP(name="Weather-Forecast-MCP-Server", lifespan=_lifespan)
+
+
+class UpstreamError(Exception):
+    """
+    Raised when an Open-Meteo API call fails or returns an unusable payload.
+    
+    The message names the failing API; the underlying error is chained as __cause__
+    and only formatted when the tool builds its error response.
+    """
+
+
+class NotFoundError(Exception):
+    """Raised when a city can't be resolved to coordinates"""
+
+
+@dataclass(slots=True)
+class Location:
+    """Resolved location of a weather query"""
+    city: str
+    country: str
+    region: str
+    latitude: float
+    longitude: float
+    
+    @classmethod
+    def from_geocode(cls, location: Dict[str, Any]) -> "Location":
+        """Build from a get_coordinates result"""
+        return cls(
+            city=location["name"],
+            country=location["country"],
+            region=location["admin1"],
+            latitude=location["latitude"],
+            longitude=location["longitude"]
+        )
+
+
+@dataclass(slots=True)
+class DateRange:
+    """Inclusive date range of a historical query, in YYYY-MM-DD format"""
+    start: str
+    end: str
+
+
+@dataclass(slots=True)
+class CurrentWeather:
+    """Response envelope for current weather queries"""
+    location: Location
+    current: Dict[str, Any]
+    units: Dict[str, str]
+    timestamp: str
+
+
+@dataclass(slots=True)
+class HistoricalWeather:
+    """Response envelope for historical weather queries"""
+    location: Location
+    date_range: DateRange
+    daily: Dict[str, List[Any]]
+    units: Dict[str, str]
+    timestamp: str
+
+
+# Shared async HTTP client so geocoding and weather calls reuse keep-alive
+# connections and the event loop can serve other tool calls while I/O is in flight
+_http = httpx.AsyncClient(
+    headers={
+        "User-Agent": "Weather-Forecast-MCP-Server/0.1",
+        # Daily arrays of small floats and repeated nulls compress several-fold
+        "Accept-Encoding": "br, gzip"
+    },
+    timeout=httpx.Timeout(10.0, connect=3.0),
+    # Pool limits belong on the transport; the client ignores them when one is given
+    transport=httpx.AsyncHTTPTransport(
+        retries=3,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+)
+
+# Upstream status codes worth retrying, and the backoff between attempts
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.2
+
+# City -> coordinates is effectively static, so successful lookups are cached for
+# a long time; misses (typos, unknown places) get a short negative-cache entry
+_geocode_cache: TTLCache = TTLCache(maxsize=4096, ttl=86400 * 30)
+_geocode_misses: TTLCache = TTLCache(maxsize=1024, ttl=300)
+# Geocode lookups currently in flight, keyed like the caches above
+_geocode_inflight: Dict[str, asyncio.Task] = {}
+
+# Persistent cache for upstream weather payloads. Archive data for settled dates
+# never changes, so it is kept indefinitely; current conditions expire quickly
+_weather_cache = diskcache.Cache(
+    os.path.join(tempfile.gettempdir(), "wx_archive"),
+    size_limit=512 << 20
+)
+CURRENT_WEATHER_TTL = 300
+RECENT_ARCHIVE_TTL = 3600
+
+# Variables requested from Open-Meteo, pre-joined into the comma-separated form
+# the API accepts so the query string isn't rebuilt from a list on every call
+_CURRENT_VARS = (
+    "temperature_2m",
+    "relative_humidity_2m",
+    "apparent_temperature",
+    "precipitation",
+    "rain",
+    "snowfall",
+    "weather_code",
+    "cloud_cover",
+    "pressure_msl",
+    "surface_pressure",
+    "wind_speed_10m",
+    "wind_direction_10m",
+    "wind_gusts_10m"
+)
+
+_DAILY_VARS = (
+    "weather_code",
+    "temperature_2m_max",
+    "temperature_2m_min",
+    "temperature_2m_mean",
+    "apparent_temperature_max",
+    "apparent_temperature_min",
+    "apparent_temperature_mean",
+    "sunrise",
+    "sunset",
+    "precipitation_sum",
+    "rain_sum",
+    "snowfall_sum",
+    "precipitation_hours",
+    "wind_speed_10m_max",
+    "wind_gusts_10m_max",
+    "wind_direction_10m_dominant",
+    "shortwave_radiation_sum"
+)
+
+_UNIT_PARAMS = {
+    "temperature_unit": "celsius",
+    "wind_speed_unit": "kmh",
+    "precipitation_unit": "mm"
+}
+_BASE_CURRENT_PARAMS = {"current": ",".join(_CURRENT_VARS), **_UNIT_PARAMS}
+_BASE_DAILY_PARAMS = {"daily": ",".join(_DAILY_VARS), **_UNIT_PARAMS}
+_ARCHIVE_FIELDS = frozenset({"daily", "daily_units"})
+
+# Part of every weather cache key, so persisted payloads fetched with a different
+# variable or unit selection are never served after these parameters change
+_CURRENT_CACHE_SCOPE = tuple(sorted(_BASE_CURRENT_PARAMS.items()))
+_DAILY_CACHE_SCOPE = tuple(sorted(_BASE_DAILY_PARAMS.items()))
+
+
+def _weather_cache_key(*parts: Any) -> str:
+    """Build a compact, stable cache key from a tuple of request parameters"""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+
+def _cache_expiry(response: httpx.Response, default: Optional[int]) -> Optional[int]:
+    """
+    Work out how long to cache a response body, honoring upstream Cache-Control.
+    
+    Args:
+        response: Upstream response
+        default: Expiry in seconds to use when the server gives no hint
+        
+    Returns:
+        The server's max-age if present, 0 if the server forbids caching,
+        otherwise the default
+    """
+    directives = [d.strip().lower() for d in response.headers.get("cache-control", "").split(",")]
+    if "no-store" in directives or "no-cache" in directives:
+        return 0
+    for directive in directives:
+        if directive.startswith("max-age="):
+            try:
+                return int(directive[len("max-age="):])
+            except ValueError:
+                break
+    return default
+
+
+async def _cached_weather(key: str) -> Optional[Dict[str, Any]]:
+    """Read an upstream payload from the weather cache without blocking the event loop"""
+    return await asyncio.to_thread(_weather_cache.get, key)
+
+
+async def _cache_weather(key: str, data: Dict[str, Any], expire: Optional[int]) -> None:
+    """Store an upstream payload in the weather cache unless its expiry is zero"""
+    if expire != 0:
+        await asyncio.to_thread(_weather_cache.set, key, data, expire=expire)
 
 
-def get_coordinates(city_name: str) -> Optional[Dict[str, float]]:
+async def _get(url: str, params: Dict[str, Any], stream: bool = False) -> httpx.Response:
+    """
+    GET a URL with the shared client, retrying transient upstream statuses.
+    
+    Args:
+        url: Endpoint URL
+        params: Query parameters
+        stream: Leave the body unread so it can be consumed incrementally;
+            the caller must close the response
+        
+    Returns:
+        The successful response
+    """
+    request = _http.build_request("GET", url, params=params)
+    for attempt in range(RETRY_ATTEMPTS + 1):
+        response = await _http.send(request, stream=stream)
+        if response.status_code not in RETRY_STATUSES or attempt == RETRY_ATTEMPTS:
+            break
+        await response.aclose()
+        await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+    if response.is_error:
+        await response.aclose()
+    response.raise_for_status()
+    return response
+
+
+class _ResponseReader:
+    """Async file-like adapter over a streamed response body, as consumed by ijson"""
+    
+    def __init__(self, response: httpx.Response):
+        self._chunks = response.aiter_bytes()
+    
+    async def read(self, size: int = -1) -> bytes:
+        # ijson probes with read(0) to detect bytes vs str; don't consume a chunk for it
+        if size == 0:
+            return b""
+        return await anext(self._chunks, b"")
+
+
+async def _stream_fields(response: httpx.Response, fields: frozenset) -> Dict[str, Any]:
+    """
+    Incrementally parse a streamed JSON object, keeping only selected top-level keys.
+    
+    Only one top-level value is materialized at a time and the raw body is never
+    buffered in full, which keeps peak memory low for large archive payloads.
+    
+    Args:
+        response: Streamed response whose body is a JSON object
+        fields: Top-level keys to keep
+        
+    Returns:
+        Dictionary with the requested keys that were present in the body
+    """
+    data = {}
+    try:
+        async for key, value in ijson.kvitems_async(_ResponseReader(response), "", use_float=True):
+            if key in fields:
+                data[key] = value
+    finally:
+        await response.aclose()
+    return data
+
+
+async def get_coordinates(city_name: str) -> Optional[Dict[str, float]]:
     """
     Get latitude and longitude for a given city name using Open-Meteo Geocoding API.
     
     Args:
         city_name: Name of the city
         
+    Returns:
+        Dictionary with 'latitude', 'longitude', and 'name' or None if not found
+    """
+    key = city_name.strip().casefold()
+    if key in _geocode_cache:
+        return _geocode_cache[key]
+    if key in _geocode_misses:
+        return None
+    
+    # Coalesce concurrent cold lookups for the same city into one upstream call.
+    # Check-and-insert has no await in between, so no lock is needed on the loop
+    task = _geocode_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_coordinates(key, city_name.strip()))
+        _geocode_inflight[key] = task
+        task.add_done_callback(lambda _: _geocode_inflight.pop(key, None))
+    # Shield so one cancelled caller doesn't cancel the fetch for the others
+    return await asyncio.shield(task)
+
+
+def _prewarm_geocode_cache(path: str = CITIES_FILE) -> None:
+    """
+    Load known city coordinates into the geocode cache.
+    
+    Args:
+        path: JSON file with a list of entries shaped like get_coordinates results
+    """
+    try:
+        with open(path, "rb") as f:
+            entries = orjson.loads(f.read())
+    except FileNotFoundError:
+        return
+    
+    for entry in entries:
+        _geocode_cache[entry["name"].strip().casefold()] = entry
+
+
+async def _fetch_coordinates(key: str, city_name: str) -> Optional[Dict[str, float]]:
+    """
+    Look up a city with the Open-Meteo Geocoding API and populate the geocode caches.
+    
+    Args:
+        key: Normalized cache key for the city
+        city_name: Name of the city as sent upstream
+        
     Returns:
         Dictionary with 'latitude', 'longitude', and 'name' or None if not found
     """
@@ -28,25 +346,27 @@ def get_coordinates(city_name: str) -> Optional[Dict[str, float]]:
     }
     
     try:
-        response = requests.get(geocoding_url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        response = await _get(geocoding_url, params=params)
+        data = orjson.loads(response.content)
         
         if "results" in data and len(data["results"]) > 0:
             result = data["results"][0]
-            return {
+            location = {
                 "latitude": result["latitude"],
                 "longitude": result["longitude"],
                 "name": result["name"],
                 "country": result.get("country", ""),
                 "admin1": result.get("admin1", "")
             }
+            _geocode_cache[key] = location
+            return location
+        _geocode_misses[key] = True
         return None
-    except Exception as e:
-        raise Exception(f"Geocoding error: {str(e)}")
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        raise UpstreamError("Geocoding") from e
 
 
-def fetch_current_weather(city_name: str) -> Dict[str, Any]:
+async def fetch_current_weather(city_name: str) -> CurrentWeather:
     """
     Fetch current weather data for a given city.
     
@@ -54,64 +374,49 @@ def fetch_current_weather(city_name: str) -> Dict[str, Any]:
         city_name: Name of the city
         
     Returns:
-        Dictionary containing current weather data
+        Current weather data for the city
     """
     # Get coordinates
-    location = get_coordinates(city_name)
+    location = await get_coordinates(city_name)
     if not location:
-        raise ValueError(f"City '{city_name}' not found")
+        raise NotFoundError(f"City '{city_name}' not found")
     
     # Fetch current weather
     weather_url = "https://api.open-meteo.com/v1/forecast"
     params = {
         "latitude": location["latitude"],
         "longitude": location["longitude"],
-        "current": [
-            "temperature_2m",
-            "relative_humidity_2m",
-            "apparent_temperature",
-            "precipitation",
-            "rain",
-            "snowfall",
-            "weather_code",
-            "cloud_cover",
-            "pressure_msl",
-            "surface_pressure",
-            "wind_speed_10m",
-            "wind_direction_10m",
-            "wind_gusts_10m"
-        ],
-        "temperature_unit": "celsius",
-        "wind_speed_unit": "kmh",
-        "precipitation_unit": "mm"
+        **_BASE_CURRENT_PARAMS
     }
     
+    cache_key = _weather_cache_key(
+        _CURRENT_CACHE_SCOPE, round(location["latitude"], 3), round(location["longitude"], 3)
+    )
+    
     try:
-        response = requests.get(weather_url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = await _cached_weather(cache_key)
+        if data is None:
+            response = await _get(weather_url, params=params)
+            data = orjson.loads(response.content)
+            if "current" not in data:
+                raise UpstreamError("Weather API") from KeyError("current")
+            await _cache_weather(cache_key, data, _cache_expiry(response, CURRENT_WEATHER_TTL))
         
-        return {
-            "location": {
-                "city": location["name"],
-                "country": location["country"],
-                "region": location["admin1"],
-                "latitude": location["latitude"],
-                "longitude": location["longitude"]
-            },
-            "current": data["current"],
-            "units": data.get("current_units", {}),
-            "timestamp": datetime.now().isoformat()
-        }
-    except Exception as e:
-        raise Exception(f"Weather API error: {str(e)}")
+        return CurrentWeather(
+            location=Location.from_geocode(location),
+            current=data["current"],
+            units=data.get("current_units", {}),
+            timestamp=datetime.now(timezone.utc).isoformat(timespec="seconds")
+        )
+    except (httpx.HTTPError, ValueError, KeyError) as e:
+        raise UpstreamError("Weather API") from e
 
 
-def fetch_historical_weather(
+async def fetch_historical_weather(
     city_name: str, 
     start_date: Optional[str] = None,
     end_date: Optional[str] = None
-) -> Dict[str, Any]:
+) -> HistoricalWeather:
     """
     Fetch historical weather data for a given city.
     
@@ -121,18 +426,19 @@ def fetch_historical_weather(
         end_date: End date in YYYY-MM-DD format (default: yesterday)
         
     Returns:
-        Dictionary containing historical weather data
+        Historical weather data for the city
     """
     # Get coordinates
-    location = get_coordinates(city_name)
+    location = await get_coordinates(city_name)
     if not location:
-        raise ValueError(f"City '{city_name}' not found")
+        raise NotFoundError(f"City '{city_name}' not found")
     
     # Set default dates if not provided
+    today = date.today()
     if not end_date:
-        end_date = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+        end_date = (today - timedelta(days=1)).isoformat()
     if not start_date:
-        start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+        start_date = (today - timedelta(days=30)).isoformat()
     
     # Fetch historical weather
     weather_url = "https://archive-api.open-meteo.com/v1/archive"
@@ -141,60 +447,128 @@ def fetch_historical_weather(
         "longitude": location["longitude"],
         "start_date": start_date,
         "end_date": end_date,
-        "daily": [
-            "weather_code",
-            "temperature_2m_max",
-            "temperature_2m_min",
-            "temperature_2m_mean",
-            "apparent_temperature_max",
-            "apparent_temperature_min",
-            "apparent_temperature_mean",
-            "sunrise",
-            "sunset",
-            "precipitation_sum",
-            "rain_sum",
-            "snowfall_sum",
-            "precipitation_hours",
-            "wind_speed_10m_max",
-            "wind_gusts_10m_max",
-            "wind_direction_10m_dominant",
-            "shortwave_radiation_sum"
-        ],
-        "temperature_unit": "celsius",
-        "wind_speed_unit": "kmh",
-        "precipitation_unit": "mm"
+        **_BASE_DAILY_PARAMS
     }
     
+    cache_key = _weather_cache_key(
+        _DAILY_CACHE_SCOPE,
+        round(location["latitude"], 3), round(location["longitude"], 3),
+        start_date, end_date
+    )
+    
     try:
-        response = requests.get(weather_url, params=params)
-        response.raise_for_status()
-        data = response.json()
+        data = await _cached_weather(cache_key)
+        if data is None:
+            response = await _get(weather_url, params=params, stream=True)
+            data = await _stream_fields(response, _ARCHIVE_FIELDS)
+            if "daily" not in data:
+                raise UpstreamError("Historical weather API") from KeyError("daily")
+            # Archive values for the last couple of days may still be revised;
+            # older ones never change, whatever the server's caching hints say
+            settled = date.fromisoformat(end_date) < today - timedelta(days=2)
+            await _cache_weather(
+                cache_key, data,
+                None if settled else _cache_expiry(response, RECENT_ARCHIVE_TTL)
+            )
         
-        return {
-            "location": {
-                "city": location["name"],
-                "country": location["country"],
-                "region": location["admin1"],
-                "latitude": location["latitude"],
-                "longitude": location["longitude"]
-            },
-            "date_range": {
-                "start": start_date,
-                "end": end_date
-            },
-            "daily": data["daily"],
-            "units": data.get("daily_units", {}),
-            "timestamp": datetime.now().isoformat()
-        }
-    except Exception as e:
-        raise Exception(f"Historical weather API error: {str(e)}")
+        return HistoricalWeather(
+            location=Location.from_geocode(location),
+            date_range=DateRange(start=start_date, end=end_date),
+            daily=data["daily"],
+            units=data.get("daily_units", {}),
+            timestamp=datetime.now(timezone.utc).isoformat(timespec="seconds")
+        )
+    except (httpx.HTTPError, ijson.JSONError, ValueError, KeyError) as e:
+        raise UpstreamError("Historical weather API") from e
+
+
+# Number of uvicorn worker processes serving the app (see __main__)
+WORKERS = max(1, int(os.environ.get("WEB_CONCURRENCY", 1)))
+
+# Concurrent upstream fetches allowed across all workers, to respect Open-Meteo
+# rate limits; each worker process gets an equal share of the budget
+MAX_CONCURRENT_FETCHES = 20
+_fetch_semaphore = asyncio.Semaphore(max(1, MAX_CONCURRENT_FETCHES // WORKERS))
+
+# Fetcher for each query type, called as fetch(city_name, start_date, end_date)
+_QUERY_FETCHERS = {
+    "current": lambda city_name, start_date, end_date: fetch_current_weather(city_name),
+    "historical": fetch_historical_weather
+}
+
+
+async def _fetch_weather(
+    city_name: str,
+    query_type: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> Union[CurrentWeather, HistoricalWeather]:
+    """
+    Fetch weather data for a city according to the query type.
+    
+    Args:
+        city_name: Name of the city
+        query_type: Type of query - "current" or "historical"
+        start_date: Start date for historical data in YYYY-MM-DD format (optional)
+        end_date: End date for historical data in YYYY-MM-DD format (optional)
+        
+    Returns:
+        Weather data for the city
+    """
+    fetch = _QUERY_FETCHERS.get(query_type.lower())
+    if fetch is None:
+        raise ValueError(f"Invalid query_type: {query_type}. Must be 'current' or 'historical'")
+    
+    async with _fetch_semaphore:
+        return await fetch(city_name, start_date, end_date)
+
+
+def _error_code(error: Exception) -> str:
+    """Map an exception to the machine-readable code reported to MCP clients"""
+    if isinstance(error, NotFoundError):
+        return "not_found"
+    if isinstance(error, UpstreamError):
+        # Upstream rejected the request itself (e.g. an out-of-range date); retrying
+        # won't help. Transport errors, 5xx and exhausted 429s remain retryable
+        cause = error.__cause__
+        if (
+            isinstance(cause, httpx.HTTPStatusError)
+            and cause.response.is_client_error
+            and cause.response.status_code != 429
+        ):
+            return "invalid_request"
+        return "upstream_error"
+    if isinstance(error, ValueError):
+        return "invalid_request"
+    return "internal_error"
+
+
+def _error_response(error: Exception, city_name: str, query_type: str) -> Dict[str, Any]:
+    """Build the error payload returned to MCP clients"""
+    if isinstance(error, UpstreamError) and error.__cause__ is not None:
+        message = f"{error} error: {error.__cause__}"
+    else:
+        message = str(error)
+    return {
+        "error": message,
+        "code": _error_code(error),
+        "city_name": city_name,
+        "query_type": query_type
+    }
+
+
+def _dumps(data: Any, pretty: bool = False) -> str:
+    """Serialize a tool response, compact unless pretty output is requested"""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else None).decode()
+
 
 @mcp.tool()
-def get_weather_data(
+async def get_weather_data(
     city_name: str,
     query_type: str = "current",
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None
+    end_date: Optional[str] = None,
+    pretty: bool = False
 ) -> str:
     """
     this tool is used to fetch weather data based on the city name and the query type.
@@ -204,38 +578,64 @@ def get_weather_data(
         query_type: Type of query - "current" or "historical" (default: "current")
         start_date: Start date for historical data in YYYY-MM-DD format (optional)
         end_date: End date for historical data in YYYY-MM-DD format (optional)
+        pretty: Indent the JSON output for readability (default: False)
         
     Returns:
         JSON string containing weather data
         
     Example usage:
         # Get current weather
-        result = get_weather_data("London")
+        result = await get_weather_data("London")
         
         # Get historical weather for last 30 days
-        result = get_weather_data("Paris", query_type="historical")
+        result = await get_weather_data("Paris", query_type="historical")
         
         # Get historical weather for specific date range
-        result = get_weather_data("Tokyo", query_type="historical", 
-                                 start_date="2024-10-01", end_date="2024-10-31")
+        result = await get_weather_data("Tokyo", query_type="historical", 
+                                       start_date="2024-10-01", end_date="2024-10-31")
     """
     try:
-        if query_type.lower() == "current":
-            data = fetch_current_weather(city_name)
-        elif query_type.lower() == "historical":
-            data = fetch_historical_weather(city_name, start_date, end_date)
-        else:
-            raise ValueError(f"Invalid query_type: {query_type}. Must be 'current' or 'historical'")
-        
-        return json.dumps(data, indent=2)
+        data = await _fetch_weather(city_name, query_type, start_date, end_date)
+        return _dumps(data, pretty)
     
     except Exception as e:
-        error_response = {
-            "error": str(e),
-            "city_name": city_name,
-            "query_type": query_type
-        }
-        return json.dumps(error_response, indent=2)
+        return _dumps(_error_response(e, city_name, query_type), pretty)
+
+
+@mcp.tool()
+async def get_weather_data_batch(
+    city_names: List[str],
+    query_type: str = "current",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    pretty: bool = False
+) -> str:
+    """
+    this tool is used to fetch weather data for several cities in a single call.
+    
+    Args:
+        city_names: Names of the cities to fetch weather for
+        query_type: Type of query - "current" or "historical" (default: "current")
+        start_date: Start date for historical data in YYYY-MM-DD format (optional)
+        end_date: End date for historical data in YYYY-MM-DD format (optional)
+        pretty: Indent the JSON output for readability (default: False)
+        
+    Returns:
+        JSON string containing a list with one weather data (or error) entry per city,
+        in the same order as city_names
+        
+    Example usage:
+        result = await get_weather_data_batch(["London", "Paris", "Tokyo"])
+    """
+    results = await asyncio.gather(
+        *[_fetch_weather(name, query_type, start_date, end_date) for name in city_names],
+        return_exceptions=True
+    )
+    entries = [
+        _error_response(result, name, query_type) if isinstance(result, Exception) else result
+        for name, result in zip(city_names, results)
+    ]
+    return _dumps(entries, pretty)
 
 
 # Weather code descriptions for reference
@@ -271,14 +671,29 @@ WEATHER_CODES = {
 }
 
 
+# Weather codes are small bounded integers, so index a dense tuple directly
+_CODE_TABLE = tuple(WEATHER_CODES.get(i) for i in range(100))
+
+
 def decode_weather_code(code: int) -> str:
     """Helper function to decode weather codes"""
-    return WEATHER_CODES.get(code, f"Unknown ({code})")
+    if isinstance(code, int):
+        description = _CODE_TABLE[code] if 0 <= code < 100 else None
+    else:
+        # Non-int codes (e.g. 3.0 from a float array) keep the mapping's lookup semantics
+        description = WEATHER_CODES.get(code)
+    return description if description is not None else f"Unknown ({code})"
 
-async def main():
-    # Use run_async() in async contexts
-    await mcp.run_async(transport="http", port=8000)
+# ASGI app for uvicorn. Stateless so any worker process can serve any request
+app = mcp.http_app(stateless_http=True)
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # loop/http default to "auto", which picks uvloop and httptools when installed
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=WORKERS,
+        log_level="warning"
+    )
 